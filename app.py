@@ -2,10 +2,18 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import pydeck as pdk
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
+import hashlib
+import json
 import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.uploaded_file_manager import UploadedFile
 
 # Konfigurasi halaman Streamlit
 st.set_page_config(
@@ -37,99 +45,439 @@ class Config:
         'esb': 'restaurant_esb_baru.csv', 
         'jakarta': 'restaurants_jakarta.csv'
     }
-
-def validate_coordinates(lat, lon):
-    """Validasi koordinat untuk memastikan dalam range Jakarta"""
-    if pd.isna(lat) or pd.isna(lon):
-        return False
     
-    if not (-90 <= lat <= 90) or not (-180 <= lon <= 180):
-        return False
+    # Kolom yang dipakai per file (nama kolom mentah, sebelum rename)
+    MATCHED_COLUMNS = [
+        'brandName_esb', 'branchName_esb', 'latitude_esb', 'longitude_esb',
+        'name_similarity', 'match_confidence'
+    ]
+    ESB_COLUMNS = ['brandName', 'branchName', 'latitude', 'longitude', 'lat', 'lon', 'cityName']
+    JAKARTA_COLUMNS = ['Nama Restoran', 'nama_restoran', 'Pricing', 'latitude', 'longitude', 'lat', 'lon']
+    
+    # Tipe data eksplisit supaya pandas tidak perlu inferensi (float32 cukup untuk peta)
+    MATCHED_DTYPES = {
+        'latitude_esb': 'float32', 'longitude_esb': 'float32',
+        'name_similarity': 'float32', 'match_confidence': 'float32'
+    }
+    ESB_DTYPES = {
+        'latitude': 'float32', 'longitude': 'float32',
+        'lat': 'float32', 'lon': 'float32',
+        'brandName': 'category'
+    }
+    JAKARTA_DTYPES = {
+        'latitude': 'float32', 'longitude': 'float32',
+        'lat': 'float32', 'lon': 'float32',
+        'Nama Restoran': 'category', 'nama_restoran': 'category'
+    }
     
-    if not (Config.JAKARTA_BOUNDS['min_lat'] <= lat <= Config.JAKARTA_BOUNDS['max_lat']):
-        return False
-    if not (Config.JAKARTA_BOUNDS['min_lon'] <= lon <= Config.JAKARTA_BOUNDS['max_lon']):
-        return False
+    # Cache Parquet hasil proses (green/orange/blue); naikkan versi jika logika proses berubah
+    CACHE_DIR = '.cache'
+    CACHE_VERSION = 'v3'
+    # Jumlah set cache hasil proses (per kombinasi file + mtime) yang disimpan di disk
+    PROCESSED_CACHE_ENTRIES = 4
+    
+    # Kolom string yang banyak berulang, disimpan sebagai category (kode int + kamus)
+    CATEGORICAL_COLUMNS = ['nama_restoran', 'cabang', 'cityName', 'Pricing', 'kategori']
+    
+    # CSV lokal di atas ukuran ini dibaca per chunk agar memori puncak tetap kecil
+    CHUNKED_READ_BYTES = 256 * 1024 * 1024
+    # Ukuran blok pembacaan streaming PyArrow (satu RecordBatch per blok)
+    CSV_BLOCK_BYTES = 64 * 1024 * 1024
     
-    return True
+    # Digit desimal float yang dikirim ke browser (5 digit ~ 1 m, setara presisi float32)
+    MAP_FLOAT_DECIMALS = 5
+    
+    # Jumlah baris default di tabel detail (tabel penuh bisa ratusan ribu baris)
+    TABLE_PREVIEW_ROWS = 2000
+    
+    # Kolom yang dikirim ke ScatterplotLayer (posisi + field tooltip)
+    MAP_COLUMNS = ['lon', 'lat', 'nama_restoran', 'kategori', 'cabang', 'name_similarity', 'match_confidence']
+    
+    # Di atas jumlah titik ini peta dirender sebagai agregasi grid
+    AGGREGATE_THRESHOLD = 50_000
+    # Ukuran sisi sel grid agregasi (derajat, ~550 m); dikirim ke GridCellLayer dalam meter
+    AGGREGATE_CELL_DEG = 0.005
+    METERS_PER_DEGREE = 110_574  # 1° lintang; 1° bujur di -6° hanya ~0.1% lebih panjang
+    
+    # Warna RGBA per kategori (key sama dengan kontrol layer di sidebar)
+    CATEGORY_COLORS = {
+        'match': [0, 255, 0, 200],
+        'esb': [255, 165, 0, 200],
+        'jakarta': [0, 0, 255, 200]
+    }
 
 def clean_coordinates(df, lat_col, lon_col, dataset_name):
     """Bersihkan dan validasi koordinat"""
     if df.empty:
         return df
+
+    # Bounds check vectorized terhadap Config.JAKARTA_BOUNDS (tanpa loop per baris).
+    # NaN selalu gagal perbandingan, jadi tidak perlu pass dropna terpisah.
+    bounds = Config.JAKARTA_BOUNDS
+    lat = df[lat_col].to_numpy(dtype='float32', na_value=np.nan)
+    lon = df[lon_col].to_numpy(dtype='float32', na_value=np.nan)
+    valid_coords_mask = (
+        (lat >= bounds['min_lat']) & (lat <= bounds['max_lat']) &
+        (lon >= bounds['min_lon']) & (lon <= bounds['max_lon'])
+    )
+
+    # Presisi float32 (~1 m) cukup untuk peta; pakai ulang array yang sudah dikonversi
+    df_valid = df.loc[valid_coords_mask].assign(**{
+        lat_col: lat[valid_coords_mask],
+        lon_col: lon[valid_coords_mask]
+    })
+    
+    return df_valid
+
+def is_uploaded_file(source):
+    """True untuk file upload Streamlit (file-like), False untuk path lokal"""
+    return hasattr(source, 'read')
+
+def csv_read_kwargs(source, columns, dtypes):
+    """Argumen read_csv agar hanya kolom yang dipakai yang diparse"""
+    if is_uploaded_file(source):
+        usecols = lambda col: col in columns
+    else:
+        # Engine PyArrow butuh list kolom yang benar-benar ada di header
+        header = pd.read_csv(source, nrows=0).columns
+        usecols = [col for col in header if col in columns]
+    # engine C eksplisit untuk jalur pandas (file upload)
+    return {'usecols': usecols, 'dtype': dtypes, 'engine': 'c'}
+
+def standardize_esb_columns(df):
+    """Samakan nama kolom koordinat data ESB"""
+    if 'longitude' in df.columns and 'latitude' in df.columns:
+        df = df.rename(columns={'longitude': 'lon', 'latitude': 'lat'})
+    return df
+
+def standardize_jakarta_columns(df):
+    """Samakan nama kolom koordinat dan nama restoran data Jakarta"""
+    rename_dict = {}
+    if 'longitude' in df.columns:
+        rename_dict['longitude'] = 'lon'
+    if 'latitude' in df.columns:
+        rename_dict['latitude'] = 'lat'
+    if 'Nama Restoran' in df.columns:
+        rename_dict['Nama Restoran'] = 'nama_restoran'
         
-    df_clean = df.dropna(subset=[lat_col, lon_col]).copy()
+    if rename_dict:
+        df = df.rename(columns=rename_dict)
+    return df
+
+def to_categorical(df):
+    """Ubah kolom string berulang menjadi dtype category"""
+    for col in Config.CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
+
+def is_large_csv(source):
+    """Cek apakah file path cukup besar untuk dibaca per chunk"""
+    return not is_uploaded_file(source) and os.path.getsize(source) > Config.CHUNKED_READ_BYTES
+
+def arrow_convert_options(usecols, dtypes, string_columns=False):
+    """ConvertOptions PyArrow: proyeksi kolom + tipe data saat parsing.
+
+    string_columns=True memberi tipe string eksplisit ke kolom tanpa dtype,
+    karena reader streaming hanya menginferensi tipe dari blok pertama.
+    """
+    column_types = {col: arrow_type(dtypes[col]) for col in usecols if col in dtypes}
+    if string_columns:
+        column_types.update({col: pa.string() for col in usecols if col not in dtypes})
+    return pacsv.ConvertOptions(
+        include_columns=usecols,
+        column_types=column_types,
+        # Samakan dengan default NA pandas (engine C untuk file upload)
+        null_values=pacsv.ConvertOptions().null_values + ['<NA>', 'None'],
+        strings_can_be_null=True
+    )
+
+def arrow_type(dtype):
+    """Tipe Arrow untuk dtype pandas di Config (category -> dictionary string)"""
+    if dtype == 'category':
+        return pa.dictionary(pa.int32(), pa.string())
+    return pa.from_numpy_dtype(np.dtype(dtype))
+
+def read_csv_in_chunks(path, usecols, dtypes, standardize, dataset_name):
+    """Baca CSV besar per RecordBatch (pyarrow.csv.open_csv); rename + cleaning per batch.
+
+    Hanya baris valid yang disimpan, jadi memori puncak ~1 blok mentah.
+    Mengembalikan (data bersih, jumlah baris mentah).
+    """
+    # Kamus category berbeda per batch - baca sebagai string, jadikan category setelah concat
+    category_columns = [col for col in usecols if dtypes.get(col) == 'category']
+    batch_dtypes = {col: dtype for col, dtype in dtypes.items() if col not in category_columns}
+    reader = pacsv.open_csv(
+        path,
+        read_options=pacsv.ReadOptions(block_size=Config.CSV_BLOCK_BYTES),
+        convert_options=arrow_convert_options(usecols, batch_dtypes, string_columns=True)
+    )
+    
+    raw_rows = 0
+    chunks = []
+    for batch in reader:
+        chunk = batch.to_pandas(split_blocks=True)
+        # Label baris = nomor baris di file, sama dengan jalur baca utuh
+        chunk.index = pd.RangeIndex(raw_rows, raw_rows + batch.num_rows)
+        raw_rows += batch.num_rows
+        chunks.append(clean_coordinates(standardize(chunk), 'lat', 'lon', dataset_name))
+    if not chunks:
+        return pd.DataFrame(), raw_rows
+    
+    df = pd.concat(chunks)
+    # standardize hanya rename kolom, jadi bisa dipakai untuk nama kolom category-nya
+    # (mis. 'Nama Restoran' -> 'nama_restoran')
+    category_columns = standardize(pd.DataFrame(columns=category_columns)).columns
+    return df.astype({col: 'category' for col in category_columns if col in df.columns}), raw_rows
+
+def read_csv_arrow(path, usecols, dtypes):
+    """Parse CSV langsung dengan pyarrow.csv (multi-thread).
+
+    Proyeksi kolom dan tipe data diterapkan saat parsing, bukan setelahnya.
+    """
+    table = pacsv.read_csv(path, convert_options=arrow_convert_options(usecols, dtypes))
+    return table.to_pandas(self_destruct=True, split_blocks=True)
+
+def write_atomic(path, write):
+    """Tulis lewat file sementara lalu rename, supaya sesi lain tidak membaca file setengah jadi"""
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def source_parquet_path(path):
+    """Path cache Parquet untuk satu file CSV sumber"""
+    digest = hashlib.sha1(f"{Config.CACHE_VERSION}|{os.path.abspath(path)}".encode()).hexdigest()[:12]
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(Config.CACHE_DIR, f"{name}_{digest}.parquet")
+
+def source_stat_stamp(path):
+    """Ukuran + mtime_ns file sumber, disimpan di metadata Parquet cache"""
+    stat = os.stat(path)
+    return f"{stat.st_size}|{stat.st_mtime_ns}".encode()
+
+def read_csv_cached(path, usecols, dtypes):
+    """Baca CSV lewat cache Parquet; parse ulang jika ukuran/mtime CSV berbeda dari saat cache ditulis.
+
+    Bukan perbandingan urutan mtime: CSV pengganti dengan mtime lebih lama
+    (rsync -t, cp -p, unzip) tetap terdeteksi berubah.
+    """
+    cache_path = source_parquet_path(path)
+    # Stat diambil sebelum parsing; CSV yang berubah saat dibaca akan di-parse ulang berikutnya
+    stamp = source_stat_stamp(path)
+    if os.path.exists(cache_path):
+        try:
+            if (pq.read_schema(cache_path).metadata or {}).get(b'source_stat') == stamp:
+                return pd.read_parquet(cache_path, columns=usecols, engine='pyarrow')
+        except Exception:
+            pass  # Cache rusak / kolom berubah - parse ulang CSV
     
-    if df_clean.empty:
-        return df_clean
+    df = read_csv_arrow(path, usecols, dtypes)
     
-    valid_coords_mask = df_clean.apply(
-        lambda row: validate_coordinates(row[lat_col], row[lon_col]), axis=1
-    )
-    df_valid = df_clean[valid_coords_mask].copy()
+    def write_parquet(tmp_path):
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), b'source_stat': stamp})
+        pq.write_table(table, tmp_path, compression='zstd')
     
-    return df_valid
+    try:
+        os.makedirs(Config.CACHE_DIR, exist_ok=True)
+        write_atomic(cache_path, write_parquet)
+    except Exception:
+        pass  # Cache hanya optimasi; direktori read-only tetap jalan
+    return df
+
+def read_csv_source(source, read_kwargs):
+    """Baca satu CSV (file upload atau path), return (DataFrame, jumlah baris mentah)"""
+    if is_uploaded_file(source):
+        # Ini adalah file upload object
+        df = pd.read_csv(source, **read_kwargs)
+    else:
+        # Ini adalah file path - pakai parser PyArrow (multi-thread), cache Parquet per file
+        df = read_csv_cached(source, read_kwargs['usecols'], read_kwargs['dtype'])
+    return df, len(df)
+
+def processed_cache_key(*sources):
+    """Key cache dari path + ukuran + mtime file lokal; None jika ada file upload.
+
+    Data upload pengguna tidak disimpan ke disk server (cukup cache memori st.cache_data).
+    """
+    if any(is_uploaded_file(source) for source in sources):
+        return None
+    digest = hashlib.sha1(Config.CACHE_VERSION.encode())
+    for source in sources:
+        stat = os.stat(source)
+        digest.update(f"{os.path.abspath(source)}|{stat.st_size}|{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:16]
+
+def processed_cache_paths(cache_key):
+    """Path file cache hasil proses: Parquet green/orange/blue + JSON stats"""
+    prefix = os.path.join(Config.CACHE_DIR, f"processed_{cache_key}")
+    return [f"{prefix}_{name}.parquet" for name in ('green', 'orange', 'blue')] + [f"{prefix}_stats.json"]
+
+def read_processed_cache(cache_key):
+    """Baca data + stats yang sudah diproses dari cache, None jika belum ada"""
+    paths = processed_cache_paths(cache_key)
+    if not all(os.path.exists(path) for path in paths):
+        return None
+    *frame_paths, stats_path = paths
+    try:
+        frames = tuple(pd.read_parquet(path, engine='pyarrow') for path in frame_paths)
+        with open(stats_path, encoding='utf-8') as f:
+            stats = json.load(f)
+    except Exception:
+        return None
+    stats['messages'] = [tuple(message) for message in stats['messages']]
+    
+    # Tandai baru dipakai supaya set ini tidak ikut dihapus evict_processed_cache
+    for path in paths:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+    return frames, stats
+
+def write_processed_cache(cache_key, frames, stats):
+    """Simpan data + stats hasil proses ke cache, return pesan error jika gagal"""
+    *frame_paths, stats_path = processed_cache_paths(cache_key)
+    
+    def write_stats(tmp_path):
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(stats, f, ensure_ascii=False)
+    
+    try:
+        os.makedirs(Config.CACHE_DIR, exist_ok=True)
+        for df, path in zip(frames, frame_paths):
+            # Index ikut disimpan supaya label baris sama saat cache hit dan cache miss
+            write_atomic(path, lambda tmp_path: df.to_parquet(tmp_path, engine='pyarrow', compression='snappy'))
+        # Stats ditulis terakhir: set cache baru dianggap lengkap setelah file ini ada
+        write_atomic(stats_path, write_stats)
+    except Exception as e:
+        return str(e)
+    evict_processed_cache()
+    return None
+
+def evict_processed_cache():
+    """Hapus set cache hasil proses lama, sisakan PROCESSED_CACHE_ENTRIES yang terakhir dipakai"""
+    try:
+        names = [name for name in os.listdir(Config.CACHE_DIR) if name.startswith('processed_')]
+    except OSError:
+        return
+    last_used = {}
+    for name in names:
+        key = name.split('_')[1]
+        try:
+            mtime = os.path.getmtime(os.path.join(Config.CACHE_DIR, name))
+        except OSError:
+            continue  # Sudah dihapus sesi lain
+        last_used[key] = max(last_used.get(key, 0), mtime)
+    
+    stale = set(sorted(last_used, key=last_used.get, reverse=True)[Config.PROCESSED_CACHE_ENTRIES:])
+    for name in names:
+        if name.split('_')[1] in stale:
+            try:
+                os.remove(os.path.join(Config.CACHE_DIR, name))
+            except OSError:
+                pass
+
+def show_load_messages(stats):
+    """Tampilkan pesan hasil load_and_process_data (di luar fungsi cached)"""
+    for level, message in stats.get('messages', []):
+        getattr(st, level)(message)
+
+def file_cache_token(source):
+    """Identitas file untuk hash st.cache_data tanpa membaca seluruh isi file.
+
+    Path lokal: path + mtime + ukuran, jadi CSV yang diedit langsung invalid
+    walau TTL belum habis. Upload: nama + ukuran + file_id (unik per upload).
+    Return bytes (bukan str) supaya tidak di-hash ulang lewat hash_funcs str.
+    """
+    if is_uploaded_file(source):
+        return f"{source.name}|{source.size}|{source.file_id}".encode()
+    try:
+        stat = os.stat(source)
+    except OSError:
+        return source.encode()
+    return f"{os.path.abspath(source)}|{stat.st_mtime_ns}|{stat.st_size}".encode()
 
 # =============================================================================
 # LOAD DATA DENGAN CACHING - DIPERBAIKI UNTUK AUTO LOAD
 # =============================================================================
-@st.cache_data(show_spinner=False, ttl=3600)
+FILE_HASH_FUNCS = {UploadedFile: file_cache_token, str: file_cache_token}
+
+# Satu loader cached per file: ganti satu file hanya mem-parse ulang file itu
+@st.cache_data(show_spinner=False, ttl=3600, hash_funcs=FILE_HASH_FUNCS)
+def load_matched_data(matched_file):
+    """Baca + cleaning file matched, return (DataFrame bersih, jumlah baris mentah)"""
+    read_kwargs = csv_read_kwargs(matched_file, Config.MATCHED_COLUMNS, Config.MATCHED_DTYPES)
+    df, raw_rows = read_csv_source(matched_file, read_kwargs)
+    return clean_coordinates(df, 'latitude_esb', 'longitude_esb', "Matched Data"), raw_rows
+
+def load_location_data(source, columns, dtypes, standardize, dataset_name):
+    """Baca + standardisasi + cleaning file ESB/Jakarta, return (DataFrame bersih, jumlah baris mentah)"""
+    read_kwargs = csv_read_kwargs(source, columns, dtypes)
+    if is_large_csv(source):
+        # File besar: streaming PyArrow per RecordBatch, standardize + cleaning sudah per batch
+        return read_csv_in_chunks(source, read_kwargs['usecols'], read_kwargs['dtype'], standardize, dataset_name)
+    df, raw_rows = read_csv_source(source, read_kwargs)
+    return clean_coordinates(standardize(df), 'lat', 'lon', dataset_name), raw_rows
+
+@st.cache_data(show_spinner=False, ttl=3600, hash_funcs=FILE_HASH_FUNCS)
+def load_esb_data(esb_file):
+    """Baca + standardisasi + cleaning file ESB"""
+    return load_location_data(esb_file, Config.ESB_COLUMNS, Config.ESB_DTYPES, standardize_esb_columns, "ESB Full Data")
+
+@st.cache_data(show_spinner=False, ttl=3600, hash_funcs=FILE_HASH_FUNCS)
+def load_jakarta_data(jakarta_file):
+    """Baca + standardisasi + cleaning file Jakarta"""
+    return load_location_data(
+        jakarta_file, Config.JAKARTA_COLUMNS, Config.JAKARTA_DTYPES, standardize_jakarta_columns, "Jakarta Full Data"
+    )
+
+@st.cache_data(show_spinner=False, ttl=3600, hash_funcs=FILE_HASH_FUNCS)
 def load_and_process_data(matched_file, esb_file, jakarta_file):
-    """Load dan proses SEMUA data tanpa sampling"""
+    """Load dan proses SEMUA data tanpa sampling.
+
+    Tidak memanggil elemen UI (fungsi ini di-cache); pesan proses dikumpulkan
+    di stats['messages'] dan ditampilkan pemanggil lewat show_load_messages.
+    """
+    messages = []
+    stats = {'messages': messages}
     
+    # Cek cache Parquet dulu - skip parsing CSV + cleaning jika file tidak berubah
     try:
-        # Handle both file upload objects and file paths
-        if hasattr(matched_file, 'read'):
-            # Ini adalah file upload object
-            df_matched = pd.read_csv(matched_file)
-        else:
-            # Ini adalah file path
-            df_matched = pd.read_csv(matched_file)
-            
-        if hasattr(esb_file, 'read'):
-            df_esb_full = pd.read_csv(esb_file)
-        else:
-            df_esb_full = pd.read_csv(esb_file)
-            
-        if hasattr(jakarta_file, 'read'):
-            df_jakarta_full = pd.read_csv(jakarta_file)
-        else:
-            df_jakarta_full = pd.read_csv(jakarta_file)
-        
-        st.info(f"📥 Data loaded - Matched: {len(df_matched):,}, ESB: {len(df_esb_full):,}, Jakarta: {len(df_jakarta_full):,}")
-        
-    except Exception as e:
-        st.error(f"❌ Error loading files: {e}")
-        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+        cache_key = processed_cache_key(matched_file, esb_file, jakarta_file)
+    except OSError:
+        cache_key = None
+    if cache_key:
+        cached = read_processed_cache(cache_key)
+        if cached is not None:
+            # Stats (jumlah baris mentah/bersih + pesan) sama bentuknya dengan saat cache miss
+            (green_data, orange_data, blue_data), stats = cached
+            stats['messages'].insert(0, ('info', f"📦 Data loaded dari cache Parquet - Green: {len(green_data):,}, Orange: {len(orange_data):,}, Blue: {len(blue_data):,}"))
+            return green_data, orange_data, blue_data, stats
     
-    # Standardize column names
     try:
-        esb_columns = df_esb_full.columns.tolist()
-        if 'longitude' in esb_columns and 'latitude' in esb_columns:
-            df_esb_full = df_esb_full.rename(columns={'longitude': 'lon', 'latitude': 'lat'})
-            
-        jakarta_columns = df_jakarta_full.columns.tolist()
-        rename_dict = {}
-        if 'longitude' in jakarta_columns:
-            rename_dict['longitude'] = 'lon'
-        if 'latitude' in jakarta_columns:
-            rename_dict['latitude'] = 'lat'
-        if 'Nama Restoran' in jakarta_columns:
-            rename_dict['Nama Restoran'] = 'nama_restoran'
-            
-        if rename_dict:
-            df_jakarta_full = df_jakarta_full.rename(columns=rename_dict)
-            
+        # Tiga file independen - baca paralel (parser C/PyArrow melepas GIL)
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            matched_future = executor.submit(load_matched_data, matched_file)
+            esb_future = executor.submit(load_esb_data, esb_file)
+            jakarta_future = executor.submit(load_jakarta_data, jakarta_file)
+            df_matched_clean, matched_rows = matched_future.result()
+            df_esb_clean, esb_rows = esb_future.result()
+            df_jakarta_clean, jakarta_rows = jakarta_future.result()
+        
+        stats.update(matched_raw=matched_rows, esb_raw=esb_rows, jakarta_raw=jakarta_rows)
+        messages.append(('info', f"📥 Data loaded - Matched: {matched_rows:,}, ESB: {esb_rows:,}, Jakarta: {jakarta_rows:,}"))
+        
     except Exception as e:
-        st.error(f"❌ Error standardizing columns: {e}")
-        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+        messages.append(('error', f"❌ Error loading files: {e}"))
+        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), stats
     
-    # Cleaning koordinat
-    df_matched_clean = clean_coordinates(df_matched, 'latitude_esb', 'longitude_esb', "Matched Data")
-    df_esb_clean = clean_coordinates(df_esb_full, 'lat', 'lon', "ESB Full Data")
-    df_jakarta_clean = clean_coordinates(df_jakarta_full, 'lat', 'lon', "Jakarta Full Data")
-    
-    st.info(f"🧹 After cleaning - Matched: {len(df_matched_clean):,}, ESB: {len(df_esb_clean):,}, Jakarta: {len(df_jakarta_clean):,}")
+    stats.update(matched_clean=len(df_matched_clean), esb_clean=len(df_esb_clean), jakarta_clean=len(df_jakarta_clean))
+    messages.append(('info', f"🧹 After cleaning - Matched: {len(df_matched_clean):,}, ESB: {len(df_esb_clean):,}, Jakarta: {len(df_jakarta_clean):,}"))
     
     # Prepare data untuk visualisasi
     green_data = pd.DataFrame()
@@ -139,81 +487,86 @@ def load_and_process_data(matched_file, esb_file, jakarta_file):
     # Data HIJAU (Matched)
     if not df_matched_clean.empty:
         try:
-            green_data = df_matched_clean[[
-                'brandName_esb', 'branchName_esb', 'latitude_esb', 'longitude_esb'
-            ]].copy()
-            green_data = green_data.rename(columns={
-                'brandName_esb': 'nama_restoran',
-                'branchName_esb': 'cabang',
-                'latitude_esb': 'lat',
-                'longitude_esb': 'lon'
-            })
-            
-            if 'name_similarity' in df_matched_clean.columns:
-                green_data['name_similarity'] = df_matched_clean['name_similarity']
-            if 'match_confidence' in df_matched_clean.columns:
-                green_data['match_confidence'] = df_matched_clean['match_confidence']
-                
-            green_data['kategori'] = 'Match'
-            green_data['warna'] = [[0, 255, 0, 200] for _ in range(len(green_data))]
+            # Satu konstruktor DataFrame dari array kolom (tanpa proyeksi/rename/setitem terpisah)
+            green_columns = {
+                'nama_restoran': df_matched_clean['brandName_esb'].array,
+                'cabang': df_matched_clean['branchName_esb'].array,
+                'lat': df_matched_clean['latitude_esb'].array,
+                'lon': df_matched_clean['longitude_esb'].array
+            }
+            for col in ('name_similarity', 'match_confidence'):
+                if col in df_matched_clean.columns:
+                    green_columns[col] = df_matched_clean[col].array
+            green_columns['kategori'] = 'Match'
+            green_data = pd.DataFrame(green_columns, index=df_matched_clean.index)
             
         except Exception as e:
-            st.error(f"❌ Error processing green data: {e}")
+            messages.append(('error', f"❌ Error processing green data: {e}"))
+    
+    # Nama matched unik dihitung sekali, dipakai untuk filter orange & biru
+    matched_names = pd.Index(green_data['nama_restoran'].unique() if not green_data.empty else [])
     
     # Data ORANGE (Hanya ESB)
     if not df_esb_clean.empty:
         try:
             if not green_data.empty:
                 # Cari brand yang ada di ESB tapi tidak di matched
-                esb_brands = set(df_esb_clean['brandName'].unique())
-                matched_brands = set(green_data['nama_restoran'].unique())
-                unmatched_brands = esb_brands - matched_brands
-                esb_unmatched = df_esb_clean[df_esb_clean['brandName'].isin(unmatched_brands)]
+                unmatched_mask = ~df_esb_clean['brandName'].isin(matched_names)
+                esb_unmatched = df_esb_clean.loc[unmatched_mask]
             else:
                 esb_unmatched = df_esb_clean
                 
-            orange_data = esb_unmatched[['brandName', 'branchName', 'lat', 'lon']].copy()
-            orange_data = orange_data.rename(columns={
-                'brandName': 'nama_restoran',
-                'branchName': 'cabang'
-            })
-            
+            orange_columns = {
+                'nama_restoran': esb_unmatched['brandName'].array,
+                'cabang': esb_unmatched['branchName'].array,
+                'lat': esb_unmatched['lat'].array,
+                'lon': esb_unmatched['lon'].array
+            }
             if 'cityName' in esb_unmatched.columns:
-                orange_data['cityName'] = esb_unmatched['cityName']
-                
-            orange_data['kategori'] = 'Hanya ESB'
-            orange_data['warna'] = [[255, 165, 0, 200] for _ in range(len(orange_data))]
+                orange_columns['cityName'] = esb_unmatched['cityName'].array
+            orange_columns['kategori'] = 'Hanya ESB'
+            orange_data = pd.DataFrame(orange_columns, index=esb_unmatched.index)
             
         except Exception as e:
-            st.error(f"❌ Error processing orange data: {e}")
+            messages.append(('error', f"❌ Error processing orange data: {e}"))
     
     # Data BIRU (Hanya Jakarta)
     if not df_jakarta_clean.empty:
         try:
             if not green_data.empty:
                 # Cari restoran yang ada di Jakarta tapi tidak di matched
-                jakarta_restaurants = set(df_jakarta_clean['nama_restoran'].unique())
-                matched_restaurants = set(green_data['nama_restoran'].unique())
-                unmatched_restaurants = jakarta_restaurants - matched_restaurants
-                jakarta_unmatched = df_jakarta_clean[df_jakarta_clean['nama_restoran'].isin(unmatched_restaurants)]
+                unmatched_mask = ~df_jakarta_clean['nama_restoran'].isin(matched_names)
+                jakarta_unmatched = df_jakarta_clean.loc[unmatched_mask]
             else:
                 jakarta_unmatched = df_jakarta_clean
                 
-            blue_data = jakarta_unmatched[['nama_restoran', 'lat', 'lon']].copy()
-            
+            blue_columns = {
+                'nama_restoran': jakarta_unmatched['nama_restoran'].array,
+                'lat': jakarta_unmatched['lat'].array,
+                'lon': jakarta_unmatched['lon'].array
+            }
             if 'Pricing' in jakarta_unmatched.columns:
-                blue_data['Pricing'] = jakarta_unmatched['Pricing']
-                
-            blue_data['cabang'] = ''
-            blue_data['cityName'] = ''
-            blue_data['kategori'] = 'Hanya Jakarta'
-            blue_data['warna'] = [[0, 0, 255, 200] for _ in range(len(blue_data))]
+                blue_columns['Pricing'] = jakarta_unmatched['Pricing'].array
+            blue_columns.update(cabang='', cityName='', kategori='Hanya Jakarta')
+            blue_data = pd.DataFrame(blue_columns, index=jakarta_unmatched.index)
             
         except Exception as e:
-            st.error(f"❌ Error processing blue data: {e}")
+            messages.append(('error', f"❌ Error processing blue data: {e}"))
     
-    st.success(f"✅ Data processing complete - Green: {len(green_data):,}, Orange: {len(orange_data):,}, Blue: {len(blue_data):,}")
-    return green_data, orange_data, blue_data
+    # Hemat memori + value_counts/isin berbasis kode integer
+    green_data, orange_data, blue_data = (
+        to_categorical(df) for df in (green_data, orange_data, blue_data)
+    )
+    
+    messages.append(('success', f"✅ Data processing complete - Green: {len(green_data):,}, Orange: {len(orange_data):,}, Blue: {len(blue_data):,}"))
+    
+    # Jangan cache hasil parsial - error di atas harus muncul lagi saat run berikutnya
+    has_error = any(level == 'error' for level, _ in messages)
+    if cache_key and not has_error:
+        cache_error = write_processed_cache(cache_key, (green_data, orange_data, blue_data), stats)
+        if cache_error:
+            messages.append(('warning', f"⚠️ Gagal menyimpan cache Parquet: {cache_error}"))
+    return green_data, orange_data, blue_data, stats
 
 # =============================================================================
 # FUNGSI UNTUK CHECK FILE EXIST DAN AUTO LOAD
@@ -237,17 +590,19 @@ def auto_load_data():
         # Semua file tersedia, auto load
         try:
             with st.spinner("🔄 Auto loading dataset dari repository..."):
-                green_data, orange_data, blue_data = load_and_process_data(
+                green_data, orange_data, blue_data, load_stats = load_and_process_data(
                     available_files['matched'],
                     available_files['esb'],
                     available_files['jakarta']
                 )
+                show_load_messages(load_stats)
                 
                 st.session_state.green_data = green_data
                 st.session_state.orange_data = orange_data
                 st.session_state.blue_data = blue_data
                 st.session_state.data_loaded = True
                 st.session_state.auto_loaded = True
+                st.session_state.data_version = uuid.uuid4().hex
                 
                 st.success(f"✅ Auto load berhasil! Total: {len(green_data) + len(orange_data) + len(blue_data):,} records")
                 return True
@@ -261,46 +616,78 @@ def auto_load_data():
 # =============================================================================
 # VISUALISASI PETA DENGAN PYDECK - MARKER LEBIH BESAR
 # =============================================================================
+def is_aggregated_view(total_points, performance_mode=False):
+    """Peta pakai agregasi grid untuk mode performa / data sangat besar"""
+    return performance_mode or total_points > Config.AGGREGATE_THRESHOLD
+
+def compact_layer_data(df):
+    """Bulatkan kolom float sebelum diserialisasi PyDeck ke JSON.
+
+    float32 dikonversi ke float Python dengan repr 17 digit
+    (-6.1479997634887695); dibulatkan jadi -6.148 sehingga payload jauh lebih kecil.
+    """
+    float_cols = df.select_dtypes(include='floating').columns
+    if len(float_cols) == 0:
+        return df
+    return df.astype({col: 'float64' for col in float_cols}).round(
+        {col: Config.MAP_FLOAT_DECIMALS for col in float_cols}
+    )
+
+def aggregate_points(df, cell_deg=None):
+    """Agregasi titik ke sel grid lat/lon: kirim pojok kiri-bawah sel + jumlah, bukan tiap titik"""
+    cell_deg = cell_deg or Config.AGGREGATE_CELL_DEG
+    ix = np.floor(df['lon'].to_numpy(dtype='float64') / cell_deg).astype(np.int64)
+    iy = np.floor(df['lat'].to_numpy(dtype='float64') / cell_deg).astype(np.int64)
+    
+    # Gabungkan indeks (ix, iy) jadi satu kode int supaya cukup satu np.unique
+    ix_min, iy_min = ix.min(), iy.min()
+    span = iy.max() - iy_min + 1
+    codes, counts = np.unique((ix - ix_min) * span + (iy - iy_min), return_counts=True)
+    
+    return pd.DataFrame({
+        'lon': (codes // span + ix_min) * cell_deg,
+        'lat': (codes % span + iy_min) * cell_deg,
+        'count': counts
+    })
+
+def density_alpha(counts, floor=110):
+    """Alpha per sel dari jumlah titik, makin padat makin pekat.
+
+    Skala log supaya beberapa sel sangat padat tidak membuat sel lain pudar;
+    floor menjaga sel berisi 1 restoran tetap terlihat.
+    """
+    scale = np.log1p(counts) / np.log1p(counts.max())
+    return (floor + (255 - floor) * scale).astype(int)
+
 def create_deck_map(green_data, orange_data, blue_data, show_layers, map_style, performance_mode=False):
     """Buat peta interaktif dengan PyDeck - MARKER LEBIH BESAR"""
     
-    # Gabungkan data berdasarkan layer yang aktif
+    # Data per kategori yang aktif - satu layer per kategori, warna konstan
     layers_data = []
     
     if show_layers['match'] and not green_data.empty:
-        green_data_copy = green_data.copy()
-        green_data_copy['layer'] = 'match'
-        layers_data.append(green_data_copy)
+        layers_data.append(('match', green_data))
         
     if show_layers['esb'] and not orange_data.empty:
-        orange_data_copy = orange_data.copy()
-        orange_data_copy['layer'] = 'esb'
-        layers_data.append(orange_data_copy)
+        layers_data.append(('esb', orange_data))
         
     if show_layers['jakarta'] and not blue_data.empty:
-        blue_data_copy = blue_data.copy()
-        blue_data_copy['layer'] = 'jakarta'
-        layers_data.append(blue_data_copy)
+        layers_data.append(('jakarta', blue_data))
     
     if not layers_data:
         st.warning("⚠️ Tidak ada data yang ditampilkan. Silakan pilih layer di sidebar.")
         return None
     
     try:
-        combined_data = pd.concat(layers_data, ignore_index=True)
-        
-        if combined_data.empty:
-            st.warning("⚠️ Tidak ada data yang valid untuk ditampilkan.")
-            return None
-            
         # Pastikan kolom yang diperlukan ada
-        required_columns = ['lon', 'lat', 'warna', 'nama_restoran', 'kategori']
-        for col in required_columns:
-            if col not in combined_data.columns:
-                st.error(f"❌ Kolom {col} tidak ditemukan dalam data")
-                return None
+        required_columns = ['lon', 'lat', 'nama_restoran', 'kategori']
+        for _, layer_data in layers_data:
+            for col in required_columns:
+                if col not in layer_data.columns:
+                    st.error(f"❌ Kolom {col} tidak ditemukan dalam data")
+                    return None
         
-        total_points = len(combined_data)
+        total_points = sum(len(layer_data) for _, layer_data in layers_data)
         
         # PERBAIKAN BESAR: Ukuran marker yang lebih besar dan mudah diklik
         if performance_mode or total_points > 5000:
@@ -318,25 +705,50 @@ def create_deck_map(green_data, orange_data, blue_data, show_layers, map_style,
             radius_scale = 8
             get_radius = 100
         
-        # PERBAIKAN UTAMA: Gunakan ScatterplotLayer dengan marker lebih besar
-        layer = pdk.Layer(
-            "ScatterplotLayer",
-            combined_data,
-            pickable=True,
-            opacity=opacity,
-            stroked=True,
-            filled=True,
-            radius_scale=radius_scale,
-            radius_min_pixels=radius_min_pixels,
-            radius_max_pixels=radius_max_pixels,
-            line_width_min_pixels=1.5,
-            get_position=['lon', 'lat'],
-            get_radius=get_radius,
-            get_fill_color='warna',
-            get_line_color=[0, 0, 0, 200],
-            auto_highlight=True,
-            highlight_color=[255, 255, 255, 255],
-        )
+        aggregated = is_aggregated_view(total_points, performance_mode)
+        layers = []
+        if aggregated:
+            # Data sangat besar: kirim sel grid yang sudah diagregasi, digambar apa adanya
+            for layer_key, layer_data in layers_data:
+                cells = aggregate_points(layer_data)
+                cells['alpha'] = density_alpha(cells['count'].to_numpy())
+                r, g, b, _ = Config.CATEGORY_COLORS[layer_key]
+                layers.append(pdk.Layer(
+                    "GridCellLayer",
+                    compact_layer_data(cells),
+                    id=f"grid-{layer_key}",
+                    pickable=True,
+                    opacity=0.8,
+                    extruded=False,
+                    cell_size=Config.AGGREGATE_CELL_DEG * Config.METERS_PER_DEGREE,
+                    get_position=['lon', 'lat'],
+                    get_fill_color=f"[{r}, {g}, {b}, alpha]",
+                    auto_highlight=True,
+                ))
+        else:
+            # PERBAIKAN UTAMA: Gunakan ScatterplotLayer dengan marker lebih besar
+            for layer_key, layer_data in layers_data:
+                # Kirim hanya posisi + field tooltip, bukan seluruh kolom
+                map_columns = [col for col in Config.MAP_COLUMNS if col in layer_data.columns]
+                layers.append(pdk.Layer(
+                    "ScatterplotLayer",
+                    compact_layer_data(layer_data[map_columns]),
+                    id=f"scatter-{layer_key}",
+                    pickable=True,
+                    opacity=opacity,
+                    stroked=True,
+                    filled=True,
+                    radius_scale=radius_scale,
+                    radius_min_pixels=radius_min_pixels,
+                    radius_max_pixels=radius_max_pixels,
+                    line_width_min_pixels=1.5,
+                    get_position=['lon', 'lat'],
+                    get_radius=get_radius,
+                    get_fill_color=Config.CATEGORY_COLORS[layer_key],
+                    get_line_color=[0, 0, 0, 200],
+                    auto_highlight=True,
+                    highlight_color=[255, 255, 255, 255],
+                ))
         
         # Tooltip yang informatif
         tooltip = {
@@ -373,14 +785,14 @@ def create_deck_map(green_data, orange_data, blue_data, show_layers, map_style,
             }
         }
         
-        # ViewState
-        view_state = pdk.ViewState(
-            latitude=Config.INITIAL_VIEW_STATE.latitude,
-            longitude=Config.INITIAL_VIEW_STATE.longitude,
-            zoom=Config.INITIAL_VIEW_STATE.zoom,
-            pitch=Config.INITIAL_VIEW_STATE.pitch,
-            bearing=Config.INITIAL_VIEW_STATE.bearing
-        )
+        if aggregated:
+            tooltip = {
+                "html": "<b>Jumlah restoran:</b> {count}",
+                "style": tooltip["style"]
+            }
+        
+        # ViewState - pakai objek yang sudah dibuat di Config (tidak diubah oleh Deck)
+        view_state = Config.INITIAL_VIEW_STATE
         
         # Map style yang kompatibel
         compatible_map_styles = {
@@ -395,7 +807,7 @@ def create_deck_map(green_data, orange_data, blue_data, show_layers, map_style,
         
         # Buat peta dengan konfigurasi yang diperbaiki
         deck = pdk.Deck(
-            layers=[layer],
+            layers=layers,
             initial_view_state=view_state,
             tooltip=tooltip,
             map_style=selected_map_style,
@@ -415,6 +827,14 @@ def create_deck_map(green_data, orange_data, blue_data, show_layers, map_style,
         st.error(f"Detail error: {traceback.format_exc()}")
         return None
 
+@st.cache_resource(show_spinner=False, max_entries=16)
+def cached_deck_map(data_version, layer_options, map_style, performance_mode, _green_data, _orange_data, _blue_data):
+    """Deck di-cache per versi data + opsi peta; toggle widget yang sama cukup lookup"""
+    # Parameter berawalan _ tidak di-hash Streamlit; layer_options = tuple (key, aktif)
+    return create_deck_map(
+        _green_data, _orange_data, _blue_data, dict(layer_options), map_style, performance_mode
+    )
+
 # =============================================================================
 # ANALISIS STATISTIK LENGKAP
 # =============================================================================
@@ -500,8 +920,13 @@ def create_comprehensive_statistics(green_data, orange_data, blue_data):
     
     # Top Restoran
     fig_top_restaurants = go.Figure()
-    all_restaurants = pd.concat([green_data, orange_data, blue_data], ignore_index=True)
-    top_restaurants = all_restaurants['nama_restoran'].value_counts().head(15)
+    # Cukup gabungkan kolom nama saja, bukan seluruh frame
+    all_names = pd.concat([
+        df.get('nama_restoran', pd.Series(dtype=object))
+        for df in (green_data, orange_data, blue_data)
+    ], ignore_index=True)
+    # nlargest: cukup seleksi 15 teratas, tanpa sort penuh semua nama unik
+    top_restaurants = all_names.value_counts(sort=False).nlargest(15)
     
     if len(top_restaurants) > 0:
         fig_top_restaurants.add_trace(go.Bar(
@@ -525,6 +950,57 @@ def create_comprehensive_statistics(green_data, orange_data, blue_data):
     
     return fig_pie, fig_bar, fig_similarity, fig_top_restaurants, total_green, total_orange, total_blue, total_all
 
+@st.cache_data(show_spinner=False, max_entries=8)
+def cached_statistics(data_version, _green_data, _orange_data, _blue_data):
+    """Statistik di-cache per versi data, tidak dibangun ulang tiap interaksi widget"""
+    # Parameter berawalan _ tidak di-hash Streamlit; data_version unik per load data
+    return create_comprehensive_statistics(_green_data, _orange_data, _blue_data)
+
+# =============================================================================
+# TABEL DATA - HANYA SEBAGIAN BARIS YANG DIKIRIM KE BROWSER
+# =============================================================================
+@st.cache_data(show_spinner=False, max_entries=8)
+def cached_csv_bytes(data_version, table_key, _df):
+    """CSV lengkap untuk download, dibuat sekali per versi data"""
+    return _df.to_csv(index=False).encode('utf-8')
+
+def show_data_table(df, table_key, data_version):
+    """Tampilkan satu halaman tabel (iloc offset) + download CSV lengkap jika diminta"""
+    col_rows, col_page = st.columns(2)
+    with col_rows:
+        page_size = st.number_input(
+            "Baris per halaman:",
+            min_value=100,
+            max_value=50_000,
+            value=Config.TABLE_PREVIEW_ROWS,
+            step=100,
+            key=f"rows_{table_key}"
+        )
+    total_pages = max(1, -(-len(df) // page_size))
+    with col_page:
+        page = st.number_input(
+            f"Halaman (dari {total_pages:,}):",
+            min_value=1,
+            value=1,
+            step=1,
+            key=f"page_{table_key}"
+        )
+    # Halaman di luar jangkauan (mis. setelah baris per halaman dinaikkan) -> halaman terakhir
+    page = min(page, total_pages)
+    offset = (page - 1) * page_size
+    
+    st.caption(f"Menampilkan baris {offset + 1:,}–{min(offset + page_size, len(df)):,} dari {len(df):,} baris")
+    st.dataframe(df.iloc[offset:offset + page_size], use_container_width=True)
+    # st.tabs merender semua tab tiap run - to_csv seluruh frame hanya dibuat jika diminta
+    if st.checkbox("📦 Siapkan CSV lengkap untuk download", key=f"prepare_csv_{table_key}"):
+        st.download_button(
+            "⬇️ Download CSV lengkap",
+            cached_csv_bytes(data_version, table_key, df),
+            file_name=f"{table_key}.csv",
+            mime="text/csv",
+            key=f"download_{table_key}"
+        )
+
 # =============================================================================
 # MAIN APP - DIPERBAIKI DENGAN AUTO LOAD
 # =============================================================================
@@ -543,6 +1019,8 @@ def main():
         st.session_state.blue_data = pd.DataFrame()
     if 'auto_loaded' not in st.session_state:
         st.session_state.auto_loaded = False
+    if 'data_version' not in st.session_state:
+        st.session_state.data_version = None
     
     # Sidebar untuk kontrol
     st.sidebar.header("🎛️ Kontrol Visualisasi")
@@ -629,14 +1107,16 @@ def main():
             
         with st.spinner("🔄 Memuat dan memproses data..."):
             try:
-                green_data, orange_data, blue_data = load_and_process_data(
+                green_data, orange_data, blue_data, load_stats = load_and_process_data(
                     matched_file, esb_file, jakarta_file
                 )
+                show_load_messages(load_stats)
                 
                 st.session_state.green_data = green_data
                 st.session_state.orange_data = orange_data
                 st.session_state.blue_data = blue_data
                 st.session_state.data_loaded = True
+                st.session_state.data_version = uuid.uuid4().hex
                 
                 st.success(f"✅ Data berhasil dimuat! Total: {len(green_data) + len(orange_data) + len(blue_data):,} records")
                 
@@ -657,7 +1137,8 @@ def main():
     # Tampilkan statistik
     st.header("📊 Analisis Statistik Komprehensif")
     
-    fig_pie, fig_bar, fig_similarity, fig_top_restaurants, total_green, total_orange, total_blue, total_all = create_comprehensive_statistics(
+    fig_pie, fig_bar, fig_similarity, fig_top_restaurants, total_green, total_orange, total_blue, total_all = cached_statistics(
+        st.session_state.data_version,
         st.session_state.green_data, 
         st.session_state.orange_data, 
         st.session_state.blue_data
@@ -694,25 +1175,41 @@ def main():
     
     total_points = len(st.session_state.green_data) + len(st.session_state.orange_data) + len(st.session_state.blue_data)
     
-    st.info(f"🎯 **Menampilkan {total_points:,} titik data**. Klik marker untuk detail.")
+    total_displayed = sum([
+        len(st.session_state.green_data) if show_layers['match'] else 0,
+        len(st.session_state.orange_data) if show_layers['esb'] else 0,
+        len(st.session_state.blue_data) if show_layers['jakarta'] else 0
+    ])
+    
+    aggregated_view = is_aggregated_view(total_displayed, performance_mode)
+    if aggregated_view:
+        st.info(f"🎯 **Menampilkan {total_displayed:,} titik data sebagai agregasi grid** (warna makin pekat = makin padat). "
+                f"Sembunyikan beberapa layer hingga ≤ {Config.AGGREGATE_THRESHOLD:,} titik untuk marker per restoran.")
+    else:
+        st.info(f"🎯 **Menampilkan {total_points:,} titik data**. Klik marker untuk detail.")
     
     if performance_mode:
         st.warning("🚀 **Mode Performa Aktif** - Beberapa optimasi diterapkan untuk data besar.")
     
     # Buat dan tampilkan peta
-    deck_map = create_deck_map(
+    deck_map = cached_deck_map(
+        st.session_state.data_version,
+        tuple(sorted(show_layers.items())),
+        map_style,
+        performance_mode,
         st.session_state.green_data,
         st.session_state.orange_data, 
-        st.session_state.blue_data,
-        show_layers,
-        map_style,
-        performance_mode
+        st.session_state.blue_data
     )
     
     if deck_map:
         st.pydeck_chart(deck_map, use_container_width=True)
         
-        # Legenda
+        # Legenda - tooltip tampilan agregasi hanya berisi jumlah restoran per sel
+        if aggregated_view:
+            hover_hint = "🖱️ **Arahkan kursor ke sel grid** untuk melihat jumlah restoran di sel itu"
+        else:
+            hover_hint = "🖱️ **Klik marker** untuk melihat detail informasi restoran"
         st.markdown(f"""
         ### 🎯 Legenda & Cara Penggunaan
         
@@ -722,7 +1219,7 @@ def main():
         - 🔵 **Biru**: Restoran yang hanya ada di dataset Jakarta - **{len(st.session_state.blue_data):,}** data
         
         **Cara Interaksi:**
-        - 🖱️ **Klik marker** untuk melihat detail informasi restoran
+        - {hover_hint}
         - 🔍 **Zoom** dengan scroll mouse
         - 🗺️ **Geser** dengan drag mouse
         - 👁️ **Sembunyikan/tampilkan layer** menggunakan kontrol di sidebar
@@ -742,34 +1239,33 @@ def main():
     
     with tab1:
         st.subheader("Ringkasan Statistik")
-        summary_data = {
+        counts = np.array([total_green, total_orange, total_blue], dtype=np.int64)
+        if total_all > 0:
+            percentages = [f"{pct:.2f}%" for pct in counts / total_all * 100]
+        else:
+            percentages = ["0%"] * len(counts)
+        summary_df = pd.DataFrame({
             'Kategori': ['Match', 'Hanya ESB', 'Hanya Jakarta', 'Total'],
-            'Jumlah': [total_green, total_orange, total_blue, total_all],
-            'Persentase': [
-                f"{(total_green/total_all)*100:.2f}%" if total_all > 0 else "0%",
-                f"{(total_orange/total_all)*100:.2f}%" if total_all > 0 else "0%", 
-                f"{(total_blue/total_all)*100:.2f}%" if total_all > 0 else "0%",
-                '100%'
-            ]
-        }
-        summary_df = pd.DataFrame(summary_data)
+            'Jumlah': np.append(counts, total_all),
+            'Persentase': percentages + ['100%']
+        })
         st.dataframe(summary_df, use_container_width=True)
     
     with tab2:
         if not st.session_state.green_data.empty:
-            st.dataframe(st.session_state.green_data, use_container_width=True)
+            show_data_table(st.session_state.green_data, 'data_match', st.session_state.data_version)
         else:
             st.info("Tidak ada data Match")
     
     with tab3:
         if not st.session_state.orange_data.empty:
-            st.dataframe(st.session_state.orange_data, use_container_width=True)
+            show_data_table(st.session_state.orange_data, 'data_hanya_esb', st.session_state.data_version)
         else:
             st.info("Tidak ada data Hanya ESB")
     
     with tab4:
         if not st.session_state.blue_data.empty:
-            st.dataframe(st.session_state.blue_data, use_container_width=True)
+            show_data_table(st.session_state.blue_data, 'data_hanya_jakarta', st.session_state.data_version)
         else:
             st.info("Tidak ada data Hanya Jakarta")
     
@@ -777,12 +1273,6 @@ def main():
     st.sidebar.markdown("---")
     st.sidebar.subheader("ℹ️ Informasi Sistem")
     
-    total_displayed = sum([
-        len(st.session_state.green_data) if show_layers['match'] else 0,
-        len(st.session_state.orange_data) if show_layers['esb'] else 0,
-        len(st.session_state.blue_data) if show_layers['jakarta'] else 0
-    ])
-    
     st.sidebar.info(f"""
     **Status Data:**
     - ✅ Match: {len(st.session_state.green_data):,}